@@ -1,82 +1,343 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from quart import Quart, render_template, request, redirect, url_for, session, flash, Response
+import asyncio
+import hashlib
 import os
+import aiofiles
 from werkzeug.utils import secure_filename  
+from collections import OrderedDict
+from threading import RLock
 from utils.extraction import extract_text_from_file
 from utils.search_utils import search_in_text, highlight_text
 from utils.summarizer import generate_summary, extract_keywords
 import secrets
 
-app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
+app = Quart(__name__)
+# Set SECRET_KEY when running several workers so they all accept the same session cookies
+app.secret_key = os.environ.get('SECRET_KEY') or secrets.token_hex(16)
 app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['TEXT_CACHE_FOLDER'] = os.path.join('uploads', 'text')  # Extracted text by content hash
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'ppt', 'pptx', 'txt'}
 
-# Ensure upload folder exists
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Copy buffer for multipart uploads
+ANALYSIS_CACHE_SIZE = 64  # Number of texts whose summary/keywords are kept
+TEXT_STORE_SIZE = 16  # Number of extracted texts kept in memory
+TEXT_CACHE_FILES = 256  # Number of extracted texts kept on disk (least recently used are pruned)
+
+# Summary and keywords per upload, keyed by text key (most recently used last)
+analysis_cache = OrderedDict()
+
+# Extracted text per upload, keyed by text key (most recently used last).
+# Filled from worker threads, hence the lock.
+text_store = OrderedDict()
+text_store_lock = RLock()
+
+# Ensure upload and text cache folders exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+os.makedirs(app.config['TEXT_CACHE_FOLDER'], exist_ok=True)
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
+    return '.' in filename and file_extension(filename) in app.config['ALLOWED_EXTENSIONS']
+
+def file_extension(filename):
+    return filename.rsplit('.', 1)[1].lower()
 
 @app.route('/')
-def index():
-    return render_template('upload.html')
+async def index():
+    return await render_template('upload.html')
+
+async def get_analysis(key, text):
+    """
+    Return the summary and keywords for a text, computing them only once per text key
+    """
+    if key in analysis_cache:
+        analysis_cache.move_to_end(key)
+        return analysis_cache[key]
+    
+    summary = await asyncio.to_thread(generate_summary, text)
+    keywords = await asyncio.to_thread(extract_keywords, text)
+    
+    analysis = {'summary': summary, 'keywords': keywords}
+    analysis_cache[key] = analysis
+    
+    if len(analysis_cache) > ANALYSIS_CACHE_SIZE:
+        analysis_cache.popitem(last=False)
+    
+    return analysis
+
+def text_key(digest, extension):
+    # The extractor is chosen by extension, so the same bytes uploaded as .txt
+    # and as .pdf give different texts and must not share a cache entry
+    return f'{digest}.{extension}'
+
+def text_cache_path(key):
+    return os.path.join(app.config['TEXT_CACHE_FOLDER'], f'{key}.txt')
+
+def partial_upload_path(filename):
+    # Keep the extension last, the extractor is picked from it
+    return os.path.join(app.config['UPLOAD_FOLDER'], f'{secrets.token_hex(8)}.part.{file_extension(filename)}')
+
+def copy_and_hash(stream, filepath):
+    """
+    Copy a file stream to disk in fixed-size chunks and return its content hash
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    
+    with open(filepath, 'wb') as dst:
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            
+            digest.update(chunk)
+            dst.write(chunk)
+    
+    return digest.hexdigest()
+
+def discard_partial_upload(part_path):
+    try:
+        os.remove(part_path)
+    except FileNotFoundError:
+        pass
+
+def save_text(text_path, text):
+    # Write then rename, so a concurrent upload of the same file never reads a partial text
+    part_path = f'{text_path}.{secrets.token_hex(8)}.part'
+    with open(part_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+    os.replace(part_path, text_path)
+    
+    prune_text_cache()
+
+def touch_text(text_path):
+    """
+    Mark a cached text as recently used, returning False if it is not cached
+    """
+    try:
+        os.utime(text_path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def prune_text_cache():
+    """
+    Delete the least recently used cached texts beyond TEXT_CACHE_FILES
+    """
+    entries = []
+    with os.scandir(app.config['TEXT_CACHE_FOLDER']) as scan:
+        for entry in scan:
+            if not entry.name.endswith('.txt'):
+                continue
+            
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                pass
+    
+    if len(entries) <= TEXT_CACHE_FILES:
+        return
+    
+    entries.sort()
+    for _, path in entries[:-TEXT_CACHE_FILES]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def store_text(key, text):
+    with text_store_lock:
+        text_store[key] = text
+        text_store.move_to_end(key)
+        
+        if len(text_store) > TEXT_STORE_SIZE:
+            text_store.popitem(last=False)
+
+def stored_text(key):
+    """
+    Return the extracted text for an upload if it is held in memory, else None
+    """
+    with text_store_lock:
+        if key in text_store:
+            text_store.move_to_end(key)
+            return text_store[key]
+    
+    return None
+
+def load_text(key):
+    """
+    Return the extracted text for an upload from memory, reading the
+    cached file from disk on a miss
+    """
+    text = stored_text(key)
+    if text is not None:
+        return text
+    
+    text_path = text_cache_path(key)
+    with open(text_path, 'r', encoding='utf-8') as file:
+        text = file.read()
+    
+    touch_text(text_path)
+    store_text(key, text)
+    return text
+
+async def load_session_text():
+    """
+    Return the extracted text for the current session, or None if there is none
+    """
+    if 'text_key' not in session:
+        return None
+    
+    key = session['text_key']
+    
+    # Fast path: no thread hop when the text is already in memory
+    text = stored_text(key)
+    if text is not None:
+        return text
+    
+    try:
+        return await asyncio.to_thread(load_text, key)
+    except OSError:
+        return None
+
+def upload_too_large():
+    content_length = request.content_length
+    return content_length is not None and content_length > app.config['MAX_CONTENT_LENGTH']
+
+async def process_upload(filename, part_path, digest):
+    """
+    Extract the text of a streamed upload unless the same content was processed
+    before, remember it in the session, and delete the upload itself
+    """
+    try:
+        key = text_key(digest, file_extension(filename))
+        text_path = text_cache_path(key)
+        
+        if not touch_text(text_path):
+            # Extraction is CPU/IO heavy, run it off the event loop
+            extracted_text = await asyncio.to_thread(extract_text_from_file, part_path)
+            await asyncio.to_thread(save_text, text_path, extracted_text)
+            store_text(key, extracted_text)
+        
+        # Store in session (the text itself stays on disk)
+        session['filename'] = filename
+        session['text_key'] = key
+        
+        await flash(f'Successfully uploaded and processed: {filename}', 'success')
+        return redirect(url_for('search_page'))
+    
+    except Exception as e:
+        await flash(f'Error processing file: {str(e)}', 'error')
+        return redirect(url_for('index'))
+    
+    finally:
+        # Only the extracted text is kept, the upload is never read again
+        discard_partial_upload(part_path)
 
 @app.route('/upload', methods=['POST'])
-def upload_file():
-    if 'file' not in request.files:
-        flash('No file selected', 'error')
+async def upload_file():
+    if upload_too_large():
+        await flash('File is too large (Max 16MB)', 'error')
         return redirect(url_for('index'))
     
-    file = request.files['file']
+    files = await request.files
+    
+    if 'file' not in files:
+        await flash('No file selected', 'error')
+        return redirect(url_for('index'))
+    
+    file = files['file']
     
     if file.filename == '':
-        flash('No file selected', 'error')
+        await flash('No file selected', 'error')
         return redirect(url_for('index'))
     
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+    # Check the secured name, it is the one used to store the upload
+    filename = secure_filename(file.filename)
+    
+    if file and allowed_file(filename):
+        part_path = partial_upload_path(filename)
         
-        # Extract text from file
+        # Stream to disk in fixed-size chunks to keep memory bounded, hashing as we go
         try:
-            extracted_text = extract_text_from_file(filepath)
-            
-            # Store in session
-            session['filename'] = filename
-            session['text'] = extracted_text
-            session['filepath'] = filepath
-            
-            flash(f'Successfully uploaded and processed: {filename}', 'success')
-            return redirect(url_for('search_page'))
-        
+            digest = await asyncio.to_thread(copy_and_hash, file.stream, part_path)
         except Exception as e:
-            flash(f'Error processing file: {str(e)}', 'error')
+            discard_partial_upload(part_path)
+            await flash(f'Error processing file: {str(e)}', 'error')
             return redirect(url_for('index'))
+        
+        return await process_upload(filename, part_path, digest)
     
     else:
-        flash('Invalid file type. Please upload PDF, PPT, PPTX, or TXT files.', 'error')
+        await flash('Invalid file type. Please upload PDF, PPT, PPTX, or TXT files.', 'error')
         return redirect(url_for('index'))
 
+@app.route('/upload_raw', methods=['POST'])
+async def upload_raw():
+    """
+    Single-file upload sent as the raw request body (filename in the query string).
+    Skips multipart parsing and streams the body straight to disk.
+    """
+    filename = secure_filename(request.args.get('filename', ''))
+    
+    if not filename:
+        await flash('No file selected', 'error')
+        return redirect(url_for('index'))
+    
+    if not allowed_file(filename):
+        await flash('Invalid file type. Please upload PDF, PPT, PPTX, or TXT files.', 'error')
+        return redirect(url_for('index'))
+    
+    if upload_too_large():
+        await flash('File is too large (Max 16MB)', 'error')
+        return redirect(url_for('index'))
+    
+    part_path = partial_upload_path(filename)
+    max_length = app.config['MAX_CONTENT_LENGTH']
+    written = 0
+    digest = hashlib.blake2b(digest_size=16)
+    
+    try:
+        async with aiofiles.open(part_path, 'wb') as dst:
+            async for chunk in request.body:
+                written += len(chunk)
+                if written > max_length:
+                    break
+                
+                digest.update(chunk)
+                await dst.write(chunk)
+    except Exception as e:
+        discard_partial_upload(part_path)
+        await flash(f'Error processing file: {str(e)}', 'error')
+        return redirect(url_for('index'))
+    
+    # Chunked bodies carry no Content-Length, so enforce the limit while streaming
+    if written > max_length:
+        discard_partial_upload(part_path)
+        await flash('File is too large (Max 16MB)', 'error')
+        return redirect(url_for('index'))
+    
+    return await process_upload(filename, part_path, digest.hexdigest())
+
 @app.route('/search')
-def search_page():
-    if 'text' not in session:
-        flash('Please upload a file first', 'warning')
+async def search_page():
+    if 'text_key' not in session:
+        await flash('Please upload a file first', 'warning')
         return redirect(url_for('index'))
     
-    return render_template('search.html', filename=session.get('filename', 'Unknown'))
+    return await render_template('search.html', filename=session.get('filename', 'Unknown'))
 
 @app.route('/search_results', methods=['POST'])
-def search_results():
-    if 'text' not in session:
-        flash('Please upload a file first', 'warning')
+async def search_results():
+    text = await load_session_text()
+    if text is None:
+        await flash('Please upload a file first', 'warning')
         return redirect(url_for('index'))
     
-    query = request.form.get('query', '').strip()
+    form = await request.form
+    query = form.get('query', '').strip()
     
     if not query:
-        flash('Please enter a search query', 'warning')
+        await flash('Please enter a search query', 'warning')
         return redirect(url_for('search_page'))
     
     # Add to recent searches
@@ -89,27 +350,27 @@ def search_results():
         session.modified = True
     
     # Perform search
-    text = session['text']
-    results = search_in_text(text, query)
+    results = await asyncio.to_thread(search_in_text, text, query)
     
-    return render_template('results.html', 
+    return await render_template('results.html', 
                          query=query, 
                          results=results, 
                          filename=session.get('filename', 'Unknown'),
                          recent_searches=session.get('recent_searches', []))
 
 @app.route('/summarize')
-def summarize_page():
-    if 'text' not in session:
-        flash('Please upload a file first', 'warning')
+async def summarize_page():
+    text = await load_session_text()
+    if text is None:
+        await flash('Please upload a file first', 'warning')
         return redirect(url_for('index'))
     
-    text = session['text']
     filename = session.get('filename', 'Unknown')
     
-    # Generate summary
-    summary = generate_summary(text)
-    keywords = extract_keywords(text)
+    # Generate summary (cached per text)
+    analysis = await get_analysis(session['text_key'], text)
+    summary = analysis['summary']
+    keywords = analysis['keywords']
     
     # Calculate stats
     word_count = len(text.split())
@@ -123,60 +384,46 @@ def summarize_page():
         'compression_ratio': round((len(summary['text']) / word_count * 100), 1) if word_count > 0 else 0
     }
     
-    return render_template('summarize.html',
+    return await render_template('summarize.html',
                          filename=filename,
                          summary=summary,
                          keywords=keywords,
                          stats=stats)
 
 @app.route('/download_summary')
-def download_summary():
-    if 'text' not in session:
-        flash('Please upload a file first', 'warning')
+async def download_summary():
+    text = await load_session_text()
+    if text is None:
+        await flash('Please upload a file first', 'warning')
         return redirect(url_for('index'))
     
-    from flask import Response
-    
-    text = session['text']
     filename = session.get('filename', 'Unknown')
-    summary = generate_summary(text)
-    keywords = extract_keywords(text)
+    analysis = await get_analysis(session['text_key'], text)
+    summary = analysis['summary']
+    keywords = analysis['keywords']
     
-    # Create downloadable text
-    download_text = f"""STUDY NOTES SUMMARY
-{'='*50}
-Original File: {filename}
-
-KEYWORDS:
-{', '.join(keywords[:20])}
-
-{'='*50}
-SUMMARY:
-
-{summary['formatted']}
-
-{'='*50}
-Generated by Study Notes Search Engine
-"""
+    # Stream the downloadable text section by section instead of building it in one string
+    async def generate():
+        yield f"STUDY NOTES SUMMARY\n{'='*50}\nOriginal File: {filename}\n\n".encode('utf-8')
+        yield f"KEYWORDS:\n{', '.join(keywords[:20])}\n\n".encode('utf-8')
+        yield f"{'='*50}\nSUMMARY:\n\n".encode('utf-8')
+        yield summary['formatted'].encode('utf-8')
+        yield f"\n\n{'='*50}\nGenerated by Study Notes Search Engine\n".encode('utf-8')
     
     return Response(
-        download_text,
+        generate(),
         mimetype='text/plain',
         headers={'Content-Disposition': f'attachment;filename=summary_{filename}.txt'}
     )
 
 @app.route('/clear')
-def clear_session():
-    # Clean up uploaded file
-    if 'filepath' in session:
-        try:
-            os.remove(session['filepath'])
-        except:
-            pass
-    
+async def clear_session():
+    # Uploads are deleted once extracted; the cached text may be shared with
+    # other sessions and is pruned by save_text, so only the reference is dropped
     session.clear()
-    flash('Session cleared. Upload a new file to start.', 'info')
+    await flash('Session cleared. Upload a new file to start.', 'info')
     return redirect(url_for('index'))
 
 if __name__ == '__main__':
+    # Quart's development server runs on Hypercorn; for deployment use `hypercorn app:app`
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -1,5 +1,30 @@
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
+from multiprocessing import get_context
 from pathlib import Path
+from threading import Lock
+
+# PDFs with fewer pages are extracted in-process; handing pages to workers would cost more than it saves
+PARALLEL_MIN_PAGES = 32
+PAGES_PER_WORKER = 16  # Smallest page range worth sending to a worker process
+
+# Worker processes for large PDFs, started on first use and reused across uploads.
+# "spawn" workers do not inherit the server's threads, locks or open files.
+_pdf_pool = None
+_pdf_pool_lock = Lock()
+
+# Patterns used on every extracted text, compiled once
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+_MULTI_SPACE_RE = re.compile(r' +')
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# str.translate table deleting the control characters that cause issues
+# and turning lone carriage returns into newlines
+_CLEAN_TABLE = dict.fromkeys(chain(range(0x00, 0x09), (0x0b, 0x0c), range(0x0e, 0x20), range(0x7f, 0xa0)))
+_CLEAN_TABLE[0x0d] = 0x0a
 
 def extract_text_from_file(filepath):
     """
@@ -18,46 +43,116 @@ def extract_text_from_file(filepath):
 
 def extract_from_pdf(filepath):
     """
-    Extract text from PDF using PyPDF2
+    Extract text from PDF using PyMuPDF, with pypdfium2 and pdfplumber as fallbacks
     """
-    try:
-        import PyPDF2
+    backends = [_pdf_pages_pymupdf, _pdf_pages_pypdfium2, _pdf_pages_pdfplumber]
+    
+    for backend in backends:
+        try:
+            pages = backend(filepath)
+        except ImportError:
+            continue
         
         text = []
-        with open(filepath, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            num_pages = len(pdf_reader.pages)
-            
-            for page_num in range(num_pages):
-                page = pdf_reader.pages[page_num]
-                page_text = page.extract_text()
-                
-                if page_text.strip():
-                    text.append(f"\n--- Page {page_num + 1} ---\n")
-                    text.append(page_text)
+        for page_num, page_text in enumerate(pages):
+            if page_text and page_text.strip():
+                text.append(f"\n--- Page {page_num + 1} ---\n")
+                text.append(page_text)
         
         extracted = ''.join(text)
         return clean_text(extracted)
     
-    except ImportError:
-        # Fallback to pdfplumber if PyPDF2 is not available
-        try:
-            import pdfplumber
-            
-            text = []
-            with pdfplumber.open(filepath) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    page_text = page.extract_text()
-                    
-                    if page_text and page_text.strip():
-                        text.append(f"\n--- Page {page_num + 1} ---\n")
-                        text.append(page_text)
-            
-            extracted = ''.join(text)
-            return clean_text(extracted)
+    raise ImportError("Please install PyMuPDF, pypdfium2 or pdfplumber: pip install PyMuPDF")
+
+def _pdf_pages_pymupdf(filepath):
+    """
+    Return the text of each PDF page using PyMuPDF (native MuPDF bindings)
+    """
+    import fitz
+    
+    doc = fitz.open(filepath)
+    try:
+        num_pages = doc.page_count
+        workers = min(os.cpu_count() or 1, num_pages // PAGES_PER_WORKER)
         
-        except ImportError:
-            raise ImportError("Please install PyPDF2 or pdfplumber: pip install PyPDF2 pdfplumber")
+        if num_pages < PARALLEL_MIN_PAGES or workers <= 1:
+            # Plain "text" mode skips the layout analysis done by "dict"/"blocks"
+            return [page.get_text("text") for page in doc]
+    finally:
+        doc.close()
+    
+    # MuPDF is not thread-safe, so split the pages into contiguous ranges and
+    # extract each range in its own process (each opens its own document)
+    bounds = [num_pages * i // workers for i in range(workers + 1)]
+    ranges = [(filepath, bounds[i], bounds[i + 1]) for i in range(workers)]
+    
+    pool = _get_pdf_pool()
+    try:
+        chunks = pool.map(_pymupdf_page_range, ranges)
+        return [page_text for chunk in chunks for page_text in chunk]
+    except BrokenProcessPool:
+        # A worker died; drop the pool so the next large PDF starts a fresh one,
+        # and extract this one in-process rather than failing the upload
+        _discard_pdf_pool(pool)
+        return _pymupdf_page_range((filepath, 0, num_pages))
+
+def _get_pdf_pool():
+    global _pdf_pool
+    
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=get_context('spawn'))
+        return _pdf_pool
+
+def _discard_pdf_pool(pool):
+    global _pdf_pool
+    
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False)
+
+def _pymupdf_page_range(page_range):
+    """
+    Return the text of pages [start, stop) of a PDF (process pool worker)
+    """
+    import fitz
+    
+    filepath, start, stop = page_range
+    doc = fitz.open(filepath)
+    try:
+        return [doc[page_num].get_text("text") for page_num in range(start, stop)]
+    finally:
+        doc.close()
+
+def _pdf_pages_pypdfium2(filepath):
+    """
+    Return the text of each PDF page using pypdfium2 (PDFium bindings)
+    """
+    import pypdfium2 as pdfium
+    
+    pages = []
+    pdf = pdfium.PdfDocument(filepath)
+    try:
+        for page_num in range(len(pdf)):
+            page = pdf[page_num]
+            textpage = page.get_textpage()
+            pages.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+    
+    return pages
+
+def _pdf_pages_pdfplumber(filepath):
+    """
+    Return the text of each PDF page using pdfplumber
+    """
+    import pdfplumber
+    
+    with pdfplumber.open(filepath) as pdf:
+        return [page.extract_text() for page in pdf.pages]
 
 def extract_from_ppt(filepath):
     """
@@ -102,20 +197,15 @@ def clean_text(text):
     """
     Clean and normalize extracted text
     """
-    # Remove excessive whitespace
-    text = re.sub(r'\n\s*\n', '\n\n', text)
-    
-    # Remove excessive spaces
-    text = re.sub(r' +', ' ', text)
-    
-    # Remove special characters that cause issues
-    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+    # Normalize CRLF first so it isn't turned into a blank line below
+    # (no copy is made when the text has no CRLF)
+    text = text.replace('\r\n', '\n')
     
-    # Normalize line endings
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    # Remove special characters that cause issues and normalize lone CRs
+    text = text.translate(_CLEAN_TABLE)
     
-    # Strip leading/trailing whitespace
-    text = text.strip()
+    # Remove excessive spaces and whitespace, then strip leading/trailing whitespace
+    text = _BLANK_LINES_RE.sub('\n\n', _MULTI_SPACE_RE.sub(' ', text)).strip()
     
     return text
 
@@ -124,7 +214,7 @@ def split_into_sentences(text):
     Split text into sentences
     """
     # Simple sentence splitting
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = _SENTENCE_SPLIT_RE.split(text)
     return [s.strip() for s in sentences if s.strip()]
 
 def split_into_lines(text):
@@ -1,32 +1,100 @@
 import re
-from collections import defaultdict
+from bisect import bisect_right
+from collections import Counter
+from functools import lru_cache
+from itertools import filterfalse
+
+import numpy as np
+
+# Patterns compiled once at import
+_PAGE_MARKER_RE = re.compile(r'---\s*(?:Page|Slide)\s+(\d+)\s*---')
+_TOKEN_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+_AND_SPLIT_RE = re.compile(r'\s+AND\s+', re.IGNORECASE)
+_OR_SPLIT_RE = re.compile(r'\s+OR\s+', re.IGNORECASE)
+
+# Common stop words left out of word frequencies, built once
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'be',
+    'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
+    'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that',
+    'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'
+})
 
 def search_in_text(text, query, context_chars=150):
     """
     Search for query in text and return results with context
     """
-    results = []
-    query_lower = query.lower()
-    text_lower = text.lower()
+    positions = find_positions(text, query)
+    
+    return {
+        'matches': build_matches(text, query, positions, context_chars),
+        'count': len(positions),
+        'query': query
+    }
+
+def find_positions(text, query):
+    """
+    Return the start position of every case-insensitive occurrence of query
+    """
+    # Zero-width lookahead so overlapping occurrences are all reported
+    pattern = re.compile(f'(?={re.escape(query)})', re.IGNORECASE)
+    return [m.start() for m in pattern.finditer(text)]
+
+def find_term_positions(text, queries):
+    """
+    Return the match positions of each (non-empty) query, finding all terms in one
+    pass over the text with an Aho-Corasick automaton when pyahocorasick is installed
+    """
+    try:
+        import ahocorasick
+    except ImportError:
+        return [find_positions(text, query) for query in queries]
     
-    # Split text into lines for line number tracking
-    lines = text.split('\n')
+    lowered = text.lower()
     
-    # Track matches
-    match_count = 0
-    position = 0
+    # Lowercasing must keep offsets aligned with the original text
+    if len(lowered) != len(text):
+        return [find_positions(text, query) for query in queries]
     
-    # Find all occurrences
-    while True:
-        pos = text_lower.find(query_lower, position)
-        if pos == -1:
-            break
-        
-        match_count += 1
-        
-        # Find which line this match is on
-        line_num = text[:pos].count('\n') + 1
+    automaton = ahocorasick.Automaton()
+    
+    for i, query in enumerate(queries):
+        key = query.lower()
         
+        # The same term may be queried more than once
+        if key in automaton:
+            automaton.get(key).append(i)
+        else:
+            automaton.add_word(key, [i])
+    
+    positions = [[] for _ in queries]
+    key_lengths = [len(query.lower()) for query in queries]
+    
+    automaton.make_automaton()
+    
+    for end, indices in automaton.iter(lowered):
+        for i in indices:
+            positions[i].append(end - key_lengths[i] + 1)
+    
+    return positions
+
+def build_matches(text, query, positions, context_chars=150, newline_offsets=None, page_markers=None):
+    """
+    Build result entries (line, page, highlighted snippet) for match positions
+    """
+    results = []
+    
+    # Offsets of newlines and page/slide markers, found once for all matches
+    if newline_offsets is None:
+        newline_offsets = find_newline_offsets(text)
+    if page_markers is None:
+        page_markers = find_page_markers(text)
+    
+    # Find which line each match is on (newlines before it, plus one)
+    line_numbers = (np.searchsorted(newline_offsets, positions) + 1).tolist()
+    
+    for pos, line_num in zip(positions, line_numbers):
         # Get context around the match
         start = max(0, pos - context_chars)
         end = min(len(text), pos + len(query) + context_chars)
@@ -43,7 +111,7 @@ def search_in_text(text, query, context_chars=150):
         highlighted_snippet = highlight_text(snippet, query)
         
         # Extract page/slide number if present
-        page_num = extract_page_number(text, pos)
+        page_num = extract_page_number(text, pos, page_markers)
         
         results.append({
             'line_number': line_num,
@@ -51,40 +119,62 @@ def search_in_text(text, query, context_chars=150):
             'snippet': highlighted_snippet,
             'position': pos
         })
-        
-        position = pos + 1
     
-    return {
-        'matches': results,
-        'count': match_count,
-        'query': query
-    }
+    return results
+
+def find_newline_offsets(text):
+    """
+    Return the sorted offsets of every newline in text as a NumPy array
+    """
+    # UTF-32 gives one code unit per character, so array indexes are string offsets
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    return np.flatnonzero(codes == 0x0a)
 
 def highlight_text(text, query):
     """
     Highlight query terms in text using <mark> tags
     """
+    # Case-insensitive replacement with highlight; a template string keeps
+    # the substitution inside the regex engine (no Python call per match)
+    highlighted = _highlight_pattern(query).sub(r'<mark>\g<0></mark>', text)
+    
+    return highlighted
+
+@lru_cache(maxsize=32)
+def _highlight_pattern(query):
+    """
+    Compile the highlight pattern for a query (cached, the same query recurs across searches)
+    """
     # Escape special regex characters in query
-    escaped_query = re.escape(query)
+    return re.compile(re.escape(query), re.IGNORECASE)
+
+def find_page_markers(text):
+    """
+    Return (end_offsets, page_numbers) for every "--- Page N ---" / "--- Slide N ---" marker
+    """
+    end_offsets = []
+    page_numbers = []
     
-    # Case-insensitive replacement with highlight
-    pattern = re.compile(escaped_query, re.IGNORECASE)
-    highlighted = pattern.sub(lambda m: f'<mark>{m.group(0)}</mark>', text)
+    for match in _PAGE_MARKER_RE.finditer(text):
+        end_offsets.append(match.end())
+        page_numbers.append(int(match.group(1)))
     
-    return highlighted
+    return end_offsets, page_numbers
 
-def extract_page_number(text, position):
+def extract_page_number(text, position, page_markers=None):
     """
-    Try to extract page/slide number near the position
+    Return the page/slide number of the last marker before the position
     """
-    # Look backwards for page/slide markers
-    search_text = text[max(0, position - 500):position]
+    if page_markers is None:
+        page_markers = find_page_markers(text)
+    
+    end_offsets, page_numbers = page_markers
     
-    # Look for patterns like "--- Page 5 ---" or "--- Slide 3 ---"
-    page_match = re.findall(r'---\s*(?:Page|Slide)\s+(\d+)\s*---', search_text)
+    # Markers must finish before the position to count
+    index = bisect_right(end_offsets, position) - 1
     
-    if page_match:
-        return int(page_match[-1])
+    if index >= 0:
+        return page_numbers[index]
     
     return None
 
@@ -94,9 +184,25 @@ def search_multiple_terms(text, queries):
     """
     all_results = []
     
-    for query in queries:
-        results = search_in_text(text, query)
-        all_results.append(results)
+    # An empty term matches nowhere useful, drop it before searching
+    queries = [query for query in queries if query]
+    if not queries:
+        return all_results
+    
+    # One scan for all terms, and one set of line/page offsets shared by every term
+    all_positions = find_term_positions(text, queries)
+    newline_offsets = find_newline_offsets(text)
+    page_markers = find_page_markers(text)
+    
+    for query, positions in zip(queries, all_positions):
+        matches = build_matches(text, query, positions,
+                                newline_offsets=newline_offsets,
+                                page_markers=page_markers)
+        all_results.append({
+            'matches': matches,
+            'count': len(positions),
+            'query': query
+        })
     
     return all_results
 
@@ -127,27 +233,12 @@ def get_word_frequency(text, top_n=20):
     """
     Get most frequent words in text
     """
-    # Remove common stop words
-    stop_words = {
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-        'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'be',
-        'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
-        'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that',
-        'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'
-    }
-    
-    # Tokenize and count
-    words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-    word_freq = defaultdict(int)
-    
-    for word in words:
-        if word not in stop_words:
-            word_freq[word] += 1
+    # Tokenize and count (excluding common stop words)
+    words = _TOKEN_RE.findall(text.lower())
+    word_freq = Counter(filterfalse(STOP_WORDS.__contains__, words))
     
     # Sort by frequency
-    sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-    
-    return sorted_words[:top_n]
+    return word_freq.most_common(top_n)
 
 def search_with_operators(text, query):
     """
@@ -155,18 +246,22 @@ def search_with_operators(text, query):
     """
     # Simple implementation of boolean search
     if ' AND ' in query.upper():
-        terms = [t.strip() for t in re.split(r'\s+AND\s+', query, flags=re.IGNORECASE)]
-        results = []
-        for term in terms:
-            term_results = search_in_text(text, term)
-            results.append(term_results)
+        terms = [t.strip() for t in _AND_SPLIT_RE.split(query)]
+        results = search_multiple_terms(text, terms)
+        if not results:
+            return results
+        
+        # Keep only matches on pages/slides where every term appears
+        common_pages = set.intersection(*[{m['page_number'] for m in r['matches']} for r in results])
+        for term_results in results:
+            term_results['matches'] = [m for m in term_results['matches'] if m['page_number'] in common_pages]
+            term_results['count'] = len(term_results['matches'])
         return results
     
     elif ' OR ' in query.upper():
-        terms = [t.strip() for t in re.split(r'\s+OR\s+', query, flags=re.IGNORECASE)]
+        terms = [t.strip() for t in _OR_SPLIT_RE.split(query)]
         combined_results = []
-        for term in terms:
-            term_results = search_in_text(text, term)
+        for term_results in search_multiple_terms(text, terms):
             combined_results.extend(term_results['matches'])
         return {
             'matches': combined_results,
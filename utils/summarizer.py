@@ -1,6 +1,30 @@
+import heapq
 import re
 from collections import Counter, defaultdict
-import string
+from functools import lru_cache
+from itertools import filterfalse
+
+import numpy as np
+
+# Words of 3+ letters, matched against lowercased text
+_TOKEN_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+
+# Patterns compiled once at import
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+_DIGIT_RE = re.compile(r'\d')
+_MARKERS_RE = re.compile(r'important|key|definition|theorem|formula|conclusion|summary', re.IGNORECASE)
+_FORMULA_VAR_RE = re.compile(r'[a-zA-Z]\s*[=+\-*/]\s*')
+_FORMULA_NUM_RE = re.compile(r'\d+\s*[=+\-*/]')
+_BULLET_RE = re.compile(r'^[\•\-\*\d+\.]\s+')
+_NUMBERED_RE = re.compile(r'^\d+\.\s+')
+
+# Patterns for definitions
+_DEFINITION_PATTERNS = [
+    re.compile(r'(.+?)\s+is\s+defined\s+as\s+(.+?)(?:\.|$)', re.IGNORECASE),
+    re.compile(r'(.+?)\s+means\s+(.+?)(?:\.|$)', re.IGNORECASE),
+    re.compile(r'(.+?):\s+(.+?)(?:\.|$)', re.IGNORECASE),
+    re.compile(r'Definition:\s+(.+?)(?:\.|$)', re.IGNORECASE),
+]
 
 def generate_summary(text, num_sentences=15, min_sentence_length=20):
     """
@@ -18,19 +42,20 @@ def generate_summary(text, num_sentences=15, min_sentence_length=20):
         }
     
     # Calculate word frequencies
-    word_freq = calculate_word_frequency(text)
+    vocab, freq = calculate_word_frequency(_tokenize(text))
     
     # Score sentences
-    sentence_scores = score_sentences(sentences, word_freq)
+    sentence_tokens = [_TOKEN_RE.findall(s.lower()) for s in sentences]
+    sentence_scores = score_sentences(sentences, sentence_tokens, vocab, freq)
     
     # Get top sentences
-    top_sentences = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:num_sentences]
+    top_sentences = heapq.nlargest(num_sentences, sentence_scores, key=lambda x: x[2])
     
     # Sort by original order
-    summary_sentences = sorted(top_sentences, key=lambda x: sentences.index(x[0]))
+    summary_sentences = sorted(top_sentences, key=lambda x: x[0])
     
     # Extract just the sentences
-    summary_text = ' '.join([s[0] for s in summary_sentences])
+    summary_text = ' '.join([s[1] for s in summary_sentences])
     
     # Format output
     formatted = format_summary_output(summary_text)
@@ -38,7 +63,7 @@ def generate_summary(text, num_sentences=15, min_sentence_length=20):
     return {
         'text': summary_text,
         'formatted': formatted,
-        'bullet_points': [s[0] for s in summary_sentences]
+        'bullet_points': [s[1] for s in summary_sentences]
     }
 
 def split_into_sentences(text):
@@ -46,7 +71,7 @@ def split_into_sentences(text):
     Split text into sentences
     """
     # Split on period, exclamation, question mark followed by space/newline
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = _SENTENCE_SPLIT_RE.split(text)
     
     # Clean and filter
     cleaned = []
@@ -57,107 +82,110 @@ def split_into_sentences(text):
     
     return cleaned
 
-def calculate_word_frequency(text):
+@lru_cache(maxsize=8)
+def _tokenize(text):
     """
-    Calculate word frequency scores
+    Tokenize text into lowercase words (cached, the same text is tokenized by several passes)
+    """
+    return tuple(_TOKEN_RE.findall(text.lower()))
+
+def calculate_word_frequency(tokens):
+    """
+    Calculate word frequency scores from a token sequence
+    Returns (vocab, freq): vocab maps each word to an id, freq[id] is its normalized frequency
     """
-    # Remove stop words
-    stop_words = get_stop_words()
-    
-    # Tokenize
-    words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-    
     # Count words (excluding stop words)
-    word_count = Counter([w for w in words if w not in stop_words])
+    word_count = Counter(filterfalse(STOP_WORDS.__contains__, tokens))
+    
+    vocab = {word: i for i, word in enumerate(word_count)}
+    counts = np.fromiter(word_count.values(), dtype=np.float64, count=len(word_count))
     
     # Normalize frequencies
-    max_freq = max(word_count.values()) if word_count else 1
-    word_freq = {word: freq / max_freq for word, freq in word_count.items()}
+    max_freq = counts.max() if len(counts) else 1
     
-    return word_freq
+    return vocab, counts / max_freq
 
-def score_sentences(sentences, word_freq):
+def score_sentences(sentences, sentence_tokens, vocab, freq):
     """
     Score sentences based on word frequencies and other factors
+    Takes the (vocab, freq) pair from calculate_word_frequency
+    Returns a list of (index, sentence, score) tuples in sentence order
     """
-    sentence_scores = {}
-    
-    for i, sentence in enumerate(sentences):
-        score = 0
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', sentence.lower())
-        
-        # Base score from word frequencies
-        for word in words:
-            if word in word_freq:
-                score += word_freq[word]
-        
-        # Bonus for sentences near the beginning (introduction)
-        if i < len(sentences) * 0.2:
-            score *= 1.3
-        
-        # Bonus for sentences with important markers
-        if any(marker in sentence.lower() for marker in ['important', 'key', 'definition', 'theorem', 'formula', 'conclusion', 'summary']):
-            score *= 1.4
-        
-        # Bonus for sentences with numbers (likely formulas/data)
-        if re.search(r'\d+', sentence):
-            score *= 1.2
-        
-        # Penalty for very short sentences
-        if len(words) < 5:
-            score *= 0.5
-        
-        # Penalty for very long sentences
-        if len(words) > 40:
-            score *= 0.8
-        
-        sentence_scores[sentence] = score
-    
-    return sentence_scores
+    count = len(sentences)
+    
+    # The extra last slot scores 0 and is used for tokens without a frequency (stop words)
+    freq = np.append(freq, 0.0)
+    unscored = len(vocab)
+    
+    # All sentence tokens as one flat id array, sentence i spanning offsets[i]:offsets[i + 1]
+    lengths = np.fromiter(map(len, sentence_tokens), dtype=np.int64, count=count)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    vocab_get = vocab.get
+    token_ids = np.fromiter((vocab_get(w, unscored) for words in sentence_tokens for w in words),
+                            dtype=np.int64, count=int(offsets[-1]))
+    
+    # Base score from word frequencies, summed per sentence
+    scores = np.zeros(count)
+    non_empty = lengths > 0
+    if non_empty.any():
+        scores[non_empty] = np.add.reduceat(freq[token_ids], offsets[:-1][non_empty])
+    
+    # Bonus for sentences near the beginning (introduction)
+    scores[np.arange(count) < count * 0.2] *= 1.3
+    
+    # Bonus for sentences with important markers
+    has_marker = np.fromiter((_MARKERS_RE.search(sentence) is not None for sentence in sentences),
+                             dtype=bool, count=count)
+    scores[has_marker] *= 1.4
+    
+    # Bonus for sentences with numbers (likely formulas/data)
+    has_number = np.fromiter((_DIGIT_RE.search(sentence) is not None for sentence in sentences),
+                             dtype=bool, count=count)
+    scores[has_number] *= 1.2
+    
+    # Penalty for very short sentences
+    scores[lengths < 5] *= 0.5
+    
+    # Penalty for very long sentences
+    scores[lengths > 40] *= 0.8
+    
+    return list(zip(range(count), sentences, scores.tolist()))
 
 def extract_keywords(text, top_n=20):
     """
     Extract important keywords from text
     """
-    stop_words = get_stop_words()
-    
-    # Tokenize
-    words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-    
-    # Count words
-    word_count = Counter([w for w in words if w not in stop_words])
+    # Count words (tokens are shared with generate_summary via the cache)
+    word_count = Counter(filterfalse(STOP_WORDS.__contains__, _tokenize(text)))
     
     # Extract keywords with frequency > 1
     keywords = [word for word, count in word_count.most_common(top_n * 2) if count > 1]
     
     return keywords[:top_n]
 
-def extract_definitions(text):
+def extract_definitions(text, max_definitions=10):
     """
     Extract potential definitions from text
+    Stops scanning as soon as max_definitions have been found
     """
     definitions = []
     
-    # Patterns for definitions
-    patterns = [
-        r'(.+?)\s+is\s+defined\s+as\s+(.+?)(?:\.|$)',
-        r'(.+?)\s+means\s+(.+?)(?:\.|$)',
-        r'(.+?):\s+(.+?)(?:\.|$)',
-        r'Definition:\s+(.+?)(?:\.|$)',
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for match in matches:
-            if isinstance(match, tuple) and len(match) >= 2:
-                term = match[0].strip()
-                definition = match[1].strip()
+    for pattern in _DEFINITION_PATTERNS:
+        # finditer is lazy, so no match past the limit is ever computed
+        for match in pattern.finditer(text):
+            groups = match.groups()
+            if len(groups) >= 2:
+                term = groups[0].strip()
+                definition = groups[1].strip()
                 if len(term) < 50 and len(definition) < 200:
                     definitions.append(f"{term}: {definition}")
-            elif isinstance(match, str):
-                definitions.append(match.strip())
+            else:
+                definitions.append(groups[0].strip())
+            
+            if len(definitions) >= max_definitions:
+                return definitions
     
-    return definitions[:10]
+    return definitions
 
 def extract_formulas(text):
     """
@@ -173,7 +201,7 @@ def extract_formulas(text):
         # Check if line contains math-like content
         if ('=' in line or '+' in line or '*' in line or '/' in line) and len(line) < 100:
             # Check if it has numbers or variables
-            if re.search(r'[a-zA-Z]\s*[=+\-*/]\s*', line) or re.search(r'\d+\s*[=+\-*/]', line):
+            if _FORMULA_VAR_RE.search(line) or _FORMULA_NUM_RE.search(line):
                 formulas.append(line)
     
     return formulas[:15]
@@ -188,7 +216,7 @@ def extract_key_points(text):
     for line in lines:
         line = line.strip()
         # Check for bullet points or numbered lists
-        if re.match(r'^[\•\-\*\d+\.]\s+', line) or re.match(r'^\d+\.\s+', line):
+        if _BULLET_RE.match(line) or _NUMBERED_RE.match(line):
             key_points.append(line)
     
     return key_points[:20]
@@ -243,6 +271,9 @@ def get_stop_words():
         'below', 'between', 'under', 'again', 'further', 'then', 'once'
     }
 
+# Built once; frozenset membership checks are shared by every call
+STOP_WORDS = frozenset(get_stop_words())
+
 def chunk_text(text, chunk_size=1000):
     """
     Split text into chunks of roughly equal size